@@ -0,0 +1,290 @@
+import functools
+import math
+import threading
+import time
+
+from flask import jsonify
+from sqlalchemy import event
+
+from models import db
+
+DEFAULT_POLICY = {
+    "enabled": False,         # switch on per term for its registration window
+    "max_concurrent": 8,      # schedule mutations running at once, across all workers
+    "tiers": ["senior", "junior", "sophomore", "freshman"],   # earlier tiers go first
+    "max_hold": 2.0,          # requests expected in within this many seconds wait in-process
+    "hold_limit": 5.0,        # but never hold a request longer than this
+    "grace": 2.0,             # a queued ticket keeps its place this long past its retry time
+    "hold_timeout": 30,       # drop an admitted ticket whose request never released it
+    "max_retry": 10,          # upper bound for the retry hint, seconds
+}
+
+
+# Ticket queries run on every admission attempt, so they are kept as plain
+# SQL against the admission_tickets table (see models.AdmissionTicket) and
+# go straight to the driver (see AdmissionControl._execute).
+# A waiting ticket counts as ahead until its expires_at: while its request
+# is held in-process, or until its retry hint is due plus the grace period.
+_AHEAD_SQL = """
+    SELECT COUNT(*) FROM admission_tickets
+    WHERE queue = :queue AND state = 'WAITING' AND expires_at >= :now
+      AND (tier < :tier OR (tier = :tier AND id < :id))
+"""
+_ACTIVE_SQL = """
+    SELECT COUNT(*) FROM admission_tickets
+    WHERE queue = :queue AND state = 'ACTIVE'
+"""
+_SWEEP = """
+    DELETE FROM admission_tickets
+    WHERE queue = :queue AND expires_at < :now
+"""
+_ENQUEUE = """
+    INSERT INTO admission_tickets
+        (queue, student_id, tier, state, created_at, last_seen, expires_at)
+    VALUES (:queue, :student_id, :tier, 'WAITING', :now, :now, :expires)
+    ON CONFLICT (queue, student_id) DO UPDATE SET last_seen = :now, expires_at = :expires
+    RETURNING id, state
+"""
+_LOAD = f"SELECT ({_ACTIVE_SQL}), ({_AHEAD_SQL})"
+_ADMIT = f"""
+    UPDATE admission_tickets SET state = 'ACTIVE', last_seen = :now, expires_at = :expires
+    WHERE id = :id AND state = 'WAITING'
+      AND ({_ACTIVE_SQL}) + ({_AHEAD_SQL}) < :limit
+"""
+_DEFER = """
+    UPDATE admission_tickets SET expires_at = :expires
+    WHERE id = :id AND state = 'WAITING'
+"""
+_RELEASE = "DELETE FROM admission_tickets WHERE id = :id"
+
+
+def policy_for(app, queue):
+    """
+    Effective admission policy for a queue: DEFAULT_POLICY, overridden by
+    ADMISSION_CONTROL["default"], overridden by ADMISSION_CONTROL[<term>].
+    """
+    cfg = app.config.get("ADMISSION_CONTROL") or {}
+    policy = dict(DEFAULT_POLICY)
+    policy.update(cfg.get("default") or {})
+    policy.update(cfg.get(queue) or {})
+    return policy
+
+
+def _tune_ticket_db(dbapi_conn, _record):
+    # Tickets are transient; losing the queue on a crash only means clients
+    # re-enqueue on their next retry, so skip fsyncs on every admit/release.
+    # Every ticket statement is atomic on its own, so the driver runs them
+    # in autocommit rather than paying for BEGIN/COMMIT on every poll.
+    dbapi_conn.isolation_level = None
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=OFF")
+    cur.close()
+
+
+class AdmissionControl:
+    """
+    Bounded-concurrency admission in front of the schedule-mutation endpoints.
+
+    Every request gets a ticket in a per-term virtual queue ordered by
+    (tier, arrival). A ticket is admitted only when the number of running
+    requests plus the waiting tickets ahead of it is below the term's limit,
+    so later arrivals never take a slot from someone in front of them.
+
+    Requests expected to get a slot within `max_hold` seconds wait for it
+    in-process (for at most `hold_limit`), polling with reads only. The rest
+    get a 429 with their position, an ETA and a whole-second Retry-After,
+    timed so they return while still `max_hold` from the front. A ticket
+    keeps its place until that retry is due plus `grace`; a student who does
+    not come back by then stops blocking those behind and rejoins at the
+    back.
+    """
+
+    def __init__(self, app, get_student, get_queue):
+        self.app = app
+        self.get_student = get_student
+        self.get_queue = get_queue
+        self._service_time = 0.05   # EWMA of admitted request duration, seconds
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+        with app.app_context():
+            self.engine = db.engines["admission"]
+        event.listen(self.engine, "connect", _tune_ticket_db)
+        # Connections opened before the listener (e.g. by create_all)
+        # would miss the pragmas.
+        self.engine.dispose()
+
+    def _execute(self, sql, params):
+        """
+        Runs one ticket statement on a pooled connection held only for that
+        statement, so a request waiting for a slot never pins a connection
+        while it sleeps. Returns (rows, rowcount).
+
+        The statements are plain SQL on the DB-API cursor: at a handful of
+        polls per request, SQLAlchemy's per-execute overhead was most of
+        their cost.
+        """
+        conn = self.engine.raw_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            return cur.fetchall(), cur.rowcount
+        finally:
+            conn.close()
+
+    def tier_for(self, student, policy):
+        tiers = policy["tiers"]
+        standing = (student.class_standing or "").lower()
+        return tiers.index(standing) if standing in tiers else len(tiers)
+
+    def enqueue(self, queue, student_id, tier, expires):
+        """
+        Takes (or refreshes) the student's ticket, keeping its place in the
+        queue. Returns the ticket's params for later calls, and its state.
+        """
+        now = time.time()
+        params = {
+            "queue": queue,
+            "student_id": student_id,
+            "tier": tier,
+            "now": now,
+            "expires": expires,
+        }
+        # Sweeping expired tickets once a second per worker is plenty.
+        if now - self._last_sweep > 1.0:
+            self._last_sweep = now
+            self._execute(_SWEEP, params)
+        rows, _ = self._execute(_ENQUEUE, params)
+        params["id"], state = rows[0]
+        return params, state
+
+    def load(self, params):
+        """
+        (running requests, waiting tickets ahead) for a ticket. Read-only,
+        so waiting requests never contend for the ticket database's lock.
+        """
+        params["now"] = time.time()
+        rows, _ = self._execute(_LOAD, params)
+        return rows[0]
+
+    def try_admit(self, params, policy):
+        now = time.time()
+        params.update({
+            "now": now,
+            "expires": now + policy["hold_timeout"],
+            "limit": policy["max_concurrent"],
+        })
+        # The count check and the state change are one UPDATE, so two
+        # workers can never both take the last slot.
+        _, rowcount = self._execute(_ADMIT, params)
+        return rowcount == 1
+
+    def defer(self, params, expires):
+        self._execute(_DEFER, {"id": params["id"], "expires": expires})
+
+    def release(self, ticket_id):
+        self._execute(_RELEASE, {"id": ticket_id})
+
+    def record_service_time(self, seconds):
+        # One slow request (e.g. a worker's first) may at most double the
+        # estimate. An inflated ETA sends queued students away on retry hints
+        # they then overshoot, which idles the slots they are ahead for.
+        with self._lock:
+            sample = min(seconds, 2 * self._service_time)
+            self._service_time = 0.8 * self._service_time + 0.2 * sample
+
+    def expected_wait(self, ahead, policy):
+        """
+        Seconds until a ticket with `ahead` tickets in front of it should
+        expect a slot, from the recent service time.
+        """
+        with self._lock:
+            service_time = self._service_time
+        return (ahead + 1) / max(policy["max_concurrent"], 1) * service_time
+
+    def retry_after(self, eta, policy):
+        """
+        Whole seconds until the student should retry: early enough to be
+        back while still `max_hold` from a slot, so they wait in-process
+        rather than sleep through their turn.
+        """
+        return min(max(math.floor(eta - policy["max_hold"]), 1), policy["max_retry"])
+
+    def queued_response(self, queue, ahead, eta, retry_after):
+        response = jsonify({
+            "error": "Registration is busy; you have a place in the queue.",
+            "queue": {
+                "term": queue,
+                "position": ahead + 1,
+                "eta_seconds": round(eta, 2),
+                "retry_after": retry_after,
+            },
+        })
+        response.status_code = 429
+        response.headers["Retry-After"] = str(retry_after)
+        return response
+
+    def admit(self, queue, student, policy):
+        """
+        Waits for a slot. Returns (ticket_id, None) once admitted, or
+        (None, 429 response) when the caller should come back later.
+        """
+        tier = self.tier_for(student, policy)
+        hold_until = time.monotonic() + policy["hold_limit"]
+        params, state = self.enqueue(
+            queue, student.id, tier, time.time() + policy["hold_limit"] + policy["grace"]
+        )
+
+        while True:
+            active, ahead = self.load(params)
+            # An ACTIVE state means this student already has a mutation in
+            # flight; wait for it like anyone else.
+            if (state == "WAITING" and active + ahead < policy["max_concurrent"]
+                    and self.try_admit(params, policy)):
+                return params["id"], None
+
+            eta = self.expected_wait(ahead, policy)
+            remaining = hold_until - time.monotonic()
+            if eta > min(policy["max_hold"], remaining):
+                break
+            # Sleeping until the expected turn keeps polls per request to a
+            # handful; each poll costs CPU the admitted requests could use.
+            time.sleep(max(eta, 0.005))
+            if state != "WAITING":
+                # The earlier request may have finished and released it.
+                params, state = self.enqueue(
+                    queue, student.id, tier, time.time() + remaining + policy["grace"]
+                )
+
+        retry_after = self.retry_after(eta, policy)
+        self.defer(params, time.time() + retry_after + policy["grace"])
+        return None, self.queued_response(queue, ahead, eta, retry_after)
+
+    def controlled(self, view):
+        """
+        Decorator that runs `view` only once the caller has been admitted.
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            student = self.get_student()
+            if not student:
+                return view(*args, **kwargs)
+
+            queue = self.get_queue()
+            policy = policy_for(self.app, queue)
+            if not policy["enabled"] or not policy["max_concurrent"]:
+                return view(*args, **kwargs)
+
+            ticket_id, queued = self.admit(queue, student, policy)
+            if ticket_id is None:
+                return queued
+
+            start = time.perf_counter()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                self.record_service_time(time.perf_counter() - start)
+                self.release(ticket_id)
+
+        return wrapper
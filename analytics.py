@@ -0,0 +1,186 @@
+import argparse
+
+from sqlalchemy import func, text
+
+from models import db, begin_immediate, Course, Term, Section, Enrollment, SectionEnrollmentCount
+
+STATUS_COLUMN = {"PENDING": "pending", "CONFIRMED": "confirmed"}
+
+_BUMP = text("""
+    INSERT INTO section_enrollment_counts (section_id, pending, confirmed)
+    VALUES (:section_id, :pending, :confirmed)
+    ON CONFLICT (section_id) DO UPDATE SET
+        pending = pending + excluded.pending,
+        confirmed = confirmed + excluded.confirmed
+""")
+
+
+def bump(section_id, pending=0, confirmed=0):
+    """
+    Adjusts a section's counters inside the caller's transaction; commit it
+    together with the enrollment change it describes.
+    """
+    db.session.execute(_BUMP, {
+        "section_id": section_id,
+        "pending": pending,
+        "confirmed": confirmed,
+    })
+
+
+def bump_status(section_id, status, delta):
+    bump(section_id, **{STATUS_COLUMN[status]: delta})
+
+
+# Rollup levels for the admin analytics endpoints: the columns each level
+# groups by, and the JSON keys they are reported under.
+SCOPES = {
+    "section": [
+        ("section_id", Section.id),
+        ("crn", Section.crn),
+        ("section_code", Section.section_code),
+        ("course_code", Course.code),
+        ("term", Section.term),
+    ],
+    "course": [
+        ("course_id", Course.id),
+        ("course_code", Course.code),
+        ("course_title", Course.title),
+        ("term", Section.term),
+    ],
+    "subject": [
+        ("subject", Course.subject),
+        ("term", Section.term),
+    ],
+    "term": [
+        ("term", Section.term),
+        ("term_label", Term.label),
+    ],
+}
+
+
+def summary(scope, term=None):
+    """
+    Enrollment counts, status breakdown and fill rate per `scope`, read from
+    the section counters: the cost grows with the number of sections, not
+    enrollments.
+    """
+    columns = SCOPES[scope]
+    group_cols = [col for _, col in columns]
+    pending = func.coalesce(func.sum(SectionEnrollmentCount.pending), 0)
+    confirmed = func.coalesce(func.sum(SectionEnrollmentCount.confirmed), 0)
+
+    query = (
+        db.session.query(
+            *group_cols,
+            func.count(Section.id),
+            func.sum(Section.capacity),
+            pending,
+            confirmed,
+        )
+        .select_from(Section)
+        .join(Course, Section.course_id == Course.id)
+        .join(Term, Section.term == Term.code)
+        .outerjoin(SectionEnrollmentCount, SectionEnrollmentCount.section_id == Section.id)
+        .group_by(*group_cols)
+        .order_by(*group_cols)
+    )
+    if term:
+        query = query.filter(Section.term == term)
+
+    result = []
+    for row in query:
+        n_sections, capacity, n_pending, n_confirmed = row[len(columns):]
+        item = {key: row[i] for i, (key, _) in enumerate(columns)}
+        enrolled = n_pending + n_confirmed
+        item.update({
+            "sections": n_sections,
+            "capacity": capacity,
+            "enrolled": enrolled,
+            "pending": n_pending,
+            "confirmed": n_confirmed,
+            "fill_rate": round(enrolled / capacity, 4) if capacity else None,
+        })
+        result.append(item)
+    return result
+
+
+def recompute(write=True):
+    """
+    Recounts every section from the enrollments table and compares with the
+    stored counters. Returns the mismatches as
+    {section_id: (stored (pending, confirmed), actual (pending, confirmed))};
+    when `write` is set the counters are replaced with the recount.
+
+    The recount and the rewrite run in one transaction that holds the write
+    lock throughout, so a bump committed by a request in between can be
+    neither miscounted nor overwritten.
+    """
+    try:
+        begin_immediate()
+
+        actual = {}
+        rows = (
+            db.session.query(Enrollment.section_id, Enrollment.status, func.count())
+            .group_by(Enrollment.section_id, Enrollment.status)
+        )
+        for section_id, status, n in rows:
+            counts = actual.setdefault(section_id, [0, 0])
+            counts[0 if status == "PENDING" else 1] += n
+
+        stored = {
+            c.section_id: (c.pending, c.confirmed)
+            for c in SectionEnrollmentCount.query.all()
+        }
+
+        mismatches = {}
+        for section_id in set(actual) | set(stored):
+            want = tuple(actual.get(section_id, (0, 0)))
+            have = stored.get(section_id, (0, 0))
+            if want != have:
+                mismatches[section_id] = (have, want)
+
+        if write:
+            SectionEnrollmentCount.query.delete()
+            db.session.add_all([
+                SectionEnrollmentCount(section_id=sid, pending=p, confirmed=c)
+                for sid, (p, c) in actual.items()
+            ])
+            db.session.commit()
+        else:
+            db.session.rollback()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompute the enrollment counters behind the admin analytics."
+    )
+    parser.add_argument(
+        "--check", action="store_true",
+        help="Only report counters that disagree with the enrollments table.",
+    )
+    args = parser.parse_args()
+
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        mismatches = recompute(write=not args.check)
+        for section_id, (have, want) in sorted(mismatches.items()):
+            print(
+                f"section {section_id}: stored pending/confirmed {have[0]}/{have[1]}, "
+                f"actual {want[0]}/{want[1]}"
+            )
+        verb = "Found" if args.check else "Fixed"
+        print(f"{verb} {len(mismatches)} mismatched sections.")
+
+    if args.check and mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
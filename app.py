@@ -1,11 +1,20 @@
 
-from flask import Flask, jsonify, request
+import zlib
+
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
+from sqlalchemy import func, or_
 from werkzeug.security import check_password_hash
-from models import db, Student, Course, Section, SectionMeeting, Enrollment, Prerequisite
+from models import (
+    db, ensure_schema, Student, Course, Term, Section, SectionMeeting, Enrollment,
+    Prerequisite, ArchivedSection, ArchivedEnrollment,
+)
+from compression import init_compression, cached_json_response
+from admission import AdmissionControl, policy_for
+import analytics
+import event_log
 
 DAY_LABEL = {1: "Mon", 2: "Tue", 3: "Wed", 4: "Thu", 5: "Fri"}
-TERM_LABEL = {"FALL": "Fall", "SPRING": "Spring", "SUMMER": "Summer"}
 
 
 def parse_time_to_minutes(t: str) -> int:
@@ -31,19 +40,49 @@ def meetings_conflict(sec_a: Section, sec_b: Section) -> bool:
     return False
 
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
 
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///registration.db"
+    app.config["SQLALCHEMY_BINDS"] = {
+        "archive": "sqlite:///registration_archive.db",
+        "admission": "sqlite:///registration_admission.db",
+        "events": "sqlite:///registration_events.db",
+    }
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Per-term admission policies, e.g. {"FALL2025": {"enabled": True,
+    # "max_concurrent": 8}}. See admission.DEFAULT_POLICY.
+    app.config["ADMISSION_CONTROL"] = {"default": {}}
+    # Append schedule mutations to the enrollment event log and apply them in
+    # the background instead of committing each one. See event_log.py.
+    app.config["ENROLLMENT_WRITE_BEHIND"] = False
+
+    # FLASK_* environment variables (e.g. FLASK_SQLALCHEMY_DATABASE_URI,
+    # FLASK_ADMISSION_CONTROL__FALL2025__max_concurrent=8) override the defaults.
+    app.config.from_prefixed_env()
+    if config:
+        app.config.update(config)
 
     
     CORS(app)
 
     db.init_app(app)
-
-    with app.app_context():
-        db.create_all()
+    compression_stats, catalog_cache = init_compression(app)
+
+    ensure_schema(app)
+
+    write_behind = app.config["ENROLLMENT_WRITE_BEHIND"]
+    if write_behind:
+        event_log.init_event_log(app)
+    else:
+        # Events logged while write-behind was on exist nowhere else, and
+        # the enrollment routes below read and write the tables directly.
+        with app.app_context():
+            applied = event_log.apply_all()
+        if applied:
+            app.logger.warning(
+                "Applied %s enrollment events left from write-behind mode.", applied
+            )
 
     
 
@@ -52,13 +91,63 @@ def create_app():
         Uses the 'email' provided by the frontend (either as a query parameter
         ?email=... or in JSON body {"email": "..."} ) to identify the Student.
         """
+        if "current_student" in g:
+            return g.current_student
+
         email = (request.args.get("email") or "").strip()
         if not email:
             data = request.get_json(silent=True) or {}
             email = (data.get("email") or "").strip()
-        if not email:
-            return None
-        return Student.query.filter_by(email=email).first()
+
+        # Memoized per request: admission control and the view both ask.
+        g.current_student = Student.query.filter_by(email=email).first() if email else None
+        return g.current_student
+
+    def confirm_queue_for(student):
+        """
+        A confirm has no section in its body, so it queues with the active
+        term of the enrollments it would confirm, preferring one whose
+        admission control is on. "*" when there are none.
+        """
+        if write_behind:
+            schedule = event_log.student_schedule(student.id)
+            section_ids = [sid for sid, status in schedule.items() if status != "CONFIRMED"]
+        else:
+            section_ids = [
+                en.section_id
+                for en in Enrollment.query.filter_by(student_id=student.id, status="PENDING")
+            ]
+        if not section_ids:
+            return "*"
+
+        terms = sorted(
+            code for (code,) in db.session.query(Section.term)
+            .join(Term, Term.code == Section.term)
+            .filter(Section.id.in_(section_ids), Term.is_active)
+            .distinct()
+        )
+        enabled = [code for code in terms if policy_for(app, code)["enabled"]]
+        return (enabled or terms or ["*"])[0]
+
+    def admission_queue_for_request():
+        """
+        Schedule mutations queue per term: the term of the section being
+        added/removed, or the "term" in the body, or for a confirm the term
+        being confirmed, or the shared "*" queue.
+        """
+        data = request.get_json(silent=True) or {}
+        if data.get("section_id"):
+            section = Section.query.get(data["section_id"])
+            if section:
+                return section.term
+        if data.get("term"):
+            return data["term"].upper()
+        student = get_current_student()
+        if request.endpoint == "confirm_schedule" and student:
+            return confirm_queue_for(student)
+        return "*"
+
+    admission = AdmissionControl(app, get_current_student, admission_queue_for_request)
 
     def section_to_dict(section, enrollment_status=None):
         course = section.course
@@ -77,7 +166,7 @@ def create_app():
             "section_id": section.id,
             "crn": section.crn,
             "term": section.term,
-            "term_label": TERM_LABEL.get(section.term, section.term),
+            "term_label": section.term_info.label if section.term_info else section.term,
             "section_code": section.section_code,
             "course": {
                 "id": course.id,
@@ -118,15 +207,15 @@ def create_app():
         })
 
     
-    @app.route("/api/courses")
-    def list_courses():
-        q = (request.args.get("q") or "").strip().lower()
-        subject = request.args.get("subject") or ""
-        credits = request.args.get("credits") or ""
-        term = (request.args.get("term") or "").upper()
-        day = request.args.get("day") or ""
+    def build_course_list(q, subject, credits, term, day):
+        query = Section.query.join(Course)
 
-        query = Course.query
+        # Without an explicit term only active terms are listed, so the
+        # query never walks sections from past years.
+        if term:
+            query = query.filter(Section.term == term)
+        else:
+            query = query.join(Term).filter(Term.is_active.is_(True))
 
         if subject:
             query = query.filter(Course.subject == subject)
@@ -136,31 +225,77 @@ def create_app():
                 query = query.filter(Course.credits == c)
             except ValueError:
                 pass
+        if q:
+            query = query.filter(or_(
+                func.lower(Course.title).contains(q, autoescape=True),
+                func.lower(Course.code).contains(q, autoescape=True),
+            ))
+        if day:
+            try:
+                d_int = int(day)
+            except ValueError:
+                d_int = None
+            if d_int:
+                query = query.filter(
+                    Section.meetings.any(SectionMeeting.day_of_week == d_int)
+                )
 
-        courses = query.all()
-        result = []
+        sections = query.order_by(Course.id, Section.id).all()
+        return [section_to_dict(section) for section in sections]
 
-        for course in courses:
-            if q and (q not in course.title.lower()) and (q not in course.code.lower()):
-                continue
+    def catalog_version():
+        """
+        The term codes, and a fingerprint of every term's state that is
+        part of each catalog cache key. Closing or archiving a term
+        (archive_terms.py, in another process) changes which sections are
+        listed, so payloads cached before it stop matching instead of
+        living out their TTL.
+        """
+        states = (
+            db.session.query(Term.code, Term.is_active, Term.archived_at)
+            .order_by(Term.code)
+            .all()
+        )
+        version = format(zlib.crc32(repr(states).encode()), "08x")
+        return {code for code, _, _ in states}, version
 
-            for section in course.sections:
-                if term and section.term.upper() != term:
-                    continue
+    @app.route("/api/terms")
+    def list_terms():
+        query = Term.query
+        if request.args.get("all") not in ("1", "true"):
+            query = query.filter(Term.is_active.is_(True))
 
-                if day:
-                    try:
-                        d_int = int(day)
-                    except ValueError:
-                        d_int = None
-                    if d_int:
-                        has_day = any(m.day_of_week == d_int for m in section.meetings)
-                        if not has_day:
-                            continue
+        return jsonify([
+            {
+                "code": t.code,
+                "label": t.label,
+                "academic_year": t.academic_year,
+                "is_active": t.is_active,
+                "archived": t.archived_at is not None,
+            }
+            for t in query.order_by(Term.academic_year, Term.code).all()
+        ])
 
-                result.append(section_to_dict(section))
+    @app.route("/api/courses")
+    def list_courses():
+        q = (request.args.get("q") or "").strip().lower()
+        subject = request.args.get("subject") or ""
+        credits = request.args.get("credits") or ""
+        term = (request.args.get("term") or "").upper()
+        day = request.args.get("day") or ""
 
-        return jsonify(result)
+        # The full catalog and per-term listings are the hot queries; serve
+        # them as stored, pre-compressed bytes. Only known terms are cached,
+        # so arbitrary ?term= values cannot grow the cache.
+        if not (q or subject or credits or day):
+            codes, version = catalog_version()
+            if not term or term in codes:
+                return cached_json_response(
+                    ("courses", term, version),
+                    lambda: build_course_list(q, subject, credits, term, day),
+                )
+
+        return jsonify(build_course_list(q, subject, credits, term, day))
 
     
     @app.route("/api/schedule")
@@ -169,6 +304,18 @@ def create_app():
         if not student:
             return jsonify({"error": "Student not found (missing or invalid email)."}), 404
 
+        if write_behind:
+            schedule = event_log.student_schedule(student.id)
+            sections = [
+                section_to_dict(section, enrollment_status=status)
+                for section, status in (
+                    (Section.query.get(section_id), status)
+                    for section_id, status in schedule.items()
+                )
+                if section
+            ]
+            return jsonify(sections)
+
         enrollments = Enrollment.query.filter_by(student_id=student.id).all()
         sections = [
             section_to_dict(en.section, enrollment_status=en.status)
@@ -178,6 +325,7 @@ def create_app():
 
     
     @app.route("/api/schedule/add", methods=["POST"])
+    @admission.controlled
     def add_to_schedule():
         student = get_current_student()
         if not student:
@@ -191,22 +339,31 @@ def create_app():
         section = Section.query.get(section_id)
         if not section:
             return jsonify({"error": "Section not found"}), 404
-
-        existing = Enrollment.query.filter_by(
-            student_id=student.id,
-            section_id=section.id
-        ).first()
+        if not section.term_info or not section.term_info.is_active:
+            return jsonify({"error": f"Term {section.term} is not open for registration."}), 400
+
+        if write_behind:
+            schedule = event_log.student_schedule(student.id)
+            existing = section.id in schedule
+            same_term_sections = [
+                other for other in map(Section.query.get, schedule)
+                if other and other.term == section.term
+            ]
+        else:
+            existing = Enrollment.query.filter_by(
+                student_id=student.id,
+                section_id=section.id
+            ).first()
+            same_term_sections = [
+                en.section for en in Enrollment.query.join(Section).filter(
+                    Enrollment.student_id == student.id,
+                    Section.term == section.term
+                )
+            ]
         if existing:
             return jsonify({"message": "Already in schedule"}), 200
 
-        
-        same_term_enrollments = Enrollment.query.join(Section).filter(
-            Enrollment.student_id == student.id,
-            Section.term == section.term
-        ).all()
-
-        for en in same_term_enrollments:
-            other_sec = en.section
+        for other_sec in same_term_sections:
             if meetings_conflict(section, other_sec):
                 return jsonify({
                     "error": (
@@ -215,18 +372,24 @@ def create_app():
                     )
                 }), 400
 
+        if write_behind:
+            seq = event_log.append("ADD", student.id, section.id)
+            return jsonify({"message": "Added to schedule", "event_seq": seq}), 202
+
         enrollment = Enrollment(
             student_id=student.id,
             section_id=section.id,
             status="PENDING",
         )
         db.session.add(enrollment)
+        analytics.bump(section.id, pending=1)
         db.session.commit()
 
         return jsonify({"message": "Added to schedule"}), 201
 
     
     @app.route("/api/schedule/remove", methods=["POST"])
+    @admission.controlled
     def remove_from_schedule():
         student = get_current_student()
         if not student:
@@ -237,6 +400,16 @@ def create_app():
         if not section_id:
             return jsonify({"error": "section_id is required"}), 400
 
+        if write_behind:
+            try:
+                section_id = int(section_id)
+            except (TypeError, ValueError):
+                return jsonify({"error": "Not in schedule"}), 404
+            if section_id not in event_log.student_schedule(student.id):
+                return jsonify({"error": "Not in schedule"}), 404
+            seq = event_log.append("REMOVE", student.id, section_id)
+            return jsonify({"message": "Removed from schedule", "event_seq": seq}), 202
+
         enrollment = Enrollment.query.filter_by(
             student_id=student.id,
             section_id=section_id
@@ -246,22 +419,32 @@ def create_app():
             return jsonify({"error": "Not in schedule"}), 404
 
         db.session.delete(enrollment)
+        analytics.bump_status(enrollment.section_id, enrollment.status, -1)
         db.session.commit()
 
         return jsonify({"message": "Removed from schedule"}), 200
 
     
     @app.route("/api/schedule/confirm", methods=["POST"])
+    @admission.controlled
     def confirm_schedule():
         student = get_current_student()
         if not student:
             return jsonify({"error": "Student not found (missing or invalid email)."}), 404
 
+        if write_behind:
+            if not event_log.student_schedule(student.id):
+                return jsonify({"error": "No sections to confirm"}), 400
+            seq = event_log.append("CONFIRM", student.id)
+            return jsonify({"message": "Schedule confirmed", "event_seq": seq}), 202
+
         enrollments = Enrollment.query.filter_by(student_id=student.id).all()
         if not enrollments:
             return jsonify({"error": "No sections to confirm"}), 400
 
         for en in enrollments:
+            if en.status != "CONFIRMED":
+                analytics.bump(en.section_id, pending=-1, confirmed=1)
             en.status = "CONFIRMED"
         db.session.commit()
 
@@ -274,9 +457,15 @@ def create_app():
         if not admin or (admin.role or "student") != "admin":
             return jsonify({"error": "Admin access only."}), 403
 
-        enrollments = Enrollment.query.all()
+        term_labels = {t.code: t.label for t in Term.query.all()}
+        term = (request.args.get("term") or "").upper()
+
+        query = Enrollment.query
+        if term:
+            query = query.join(Section).filter(Section.term == term)
+
         result = []
-        for en in enrollments:
+        for en in query.all():
             stu = en.student
             sec = en.section
             course = sec.course
@@ -287,19 +476,96 @@ def create_app():
                 "course_code": course.code,
                 "course_title": course.title,
                 "term": sec.term,
-                "term_label": TERM_LABEL.get(sec.term, sec.term),
+                "term_label": term_labels.get(sec.term, sec.term),
                 "crn": sec.crn,
                 "status": en.status,
+                "archived": False,
             })
 
+        # Archived terms are read from the archive database on request.
+        if request.args.get("include_archived") in ("1", "true"):
+            archived = ArchivedEnrollment.query
+            if term:
+                archived = archived.filter(ArchivedEnrollment.term == term)
+            archived = archived.all()
+            archived_sections = {
+                s.id: s for s in ArchivedSection.query.filter(
+                    ArchivedSection.id.in_({en.section_id for en in archived})
+                )
+            }
+            for en in archived:
+                sec = archived_sections.get(en.section_id)
+                result.append({
+                    "student_email": en.student_email,
+                    "student_name": en.student_name,
+                    "course_code": sec.course_code if sec else None,
+                    "course_title": sec.course_title if sec else None,
+                    "term": en.term,
+                    "term_label": term_labels.get(en.term, en.term),
+                    "crn": sec.crn if sec else None,
+                    "status": en.status,
+                    "archived": True,
+                })
+
         return jsonify(result)
 
+    @app.route("/api/admin/analytics/<scope>")
+    def admin_analytics(scope):
+        admin = get_current_student()
+        if not admin or (admin.role or "student") != "admin":
+            return jsonify({"error": "Admin access only."}), 403
+
+        if scope not in analytics.SCOPES:
+            return jsonify({
+                "error": f"scope must be one of: {', '.join(analytics.SCOPES)}"
+            }), 404
+
+        term = (request.args.get("term") or "").upper() or None
+        return jsonify(analytics.summary(scope, term))
+
+    @app.route("/api/admin/metrics")
+    def admin_metrics():
+        admin = get_current_student()
+        if not admin or (admin.role or "student") != "admin":
+            return jsonify({"error": "Admin access only."}), 403
+
+        return jsonify({
+            "compression": compression_stats.to_dict(),
+            "catalog_cache_sizes": catalog_cache.to_dict(),
+        })
+
     return app
 
-app = create_app()
-  
+
+def warm_up(app):
+    """
+    Builds the pre-compressed catalog payloads (full catalog and each active
+    term). Meant for a preloading gunicorn master, so forked workers start
+    with a hot cache; see gunicorn.conf.py.
+
+    The view is called directly rather than through a test client so no
+    before_request hooks (e.g. the event-log applier) start in the master.
+    """
+    with app.app_context():
+        terms = [t.code for t in Term.query.filter_by(is_active=True)]
+
+    for query in [""] + [f"?term={code}" for code in terms]:
+        with app.test_request_context(f"/api/courses{query}"):
+            app.view_functions["list_courses"]()
+
+    after_fork(app)
+
+
+def after_fork(app):
+    """
+    Drops pooled database connections inherited from the parent process;
+    SQLite connections must not be shared across a fork.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
 
 if __name__ == "__main__":
-    
-    app.run(debug=True)
+    create_app().run(debug=True)
 
@@ -0,0 +1,137 @@
+import argparse
+from datetime import datetime
+
+from app import create_app
+from models import (
+    db, Term, Section, Enrollment,
+    ArchivedSection, ArchivedSectionMeeting, ArchivedEnrollment,
+)
+
+
+def archive_term(term):
+    """
+    Moves a closed term's sections, meetings and enrollments out of the hot
+    tables into the archive database. Returns (sections, meetings, enrollments)
+    moved.
+
+    The archive and the hot tables are separate database files, so this is
+    two transactions: the archive copies are committed first, then the hot
+    rows are deleted. Archive rows keep their original ids and are written
+    with merge(), so re-running after a failure in between does not
+    duplicate anything, and nothing is deleted without its copy.
+    """
+    if term.is_active:
+        raise ValueError(f"Term {term.code} is still active; deactivate it first.")
+
+    sections = Section.query.filter_by(term=term.code).all()
+    n_meetings = 0
+    n_enrollments = 0
+
+    for sec in sections:
+        db.session.merge(ArchivedSection(
+            id=sec.id,
+            crn=sec.crn,
+            term=sec.term,
+            section_code=sec.section_code,
+            course_id=sec.course_id,
+            course_code=sec.course.code,
+            course_title=sec.course.title,
+        ))
+        for m in sec.meetings:
+            db.session.merge(ArchivedSectionMeeting(
+                id=m.id,
+                section_id=sec.id,
+                day_of_week=m.day_of_week,
+                start_time=m.start_time,
+                end_time=m.end_time,
+            ))
+            n_meetings += 1
+        for en in sec.enrollments:
+            db.session.merge(ArchivedEnrollment(
+                id=en.id,
+                student_id=en.student_id,
+                student_email=en.student.email,
+                student_name=en.student.name,
+                section_id=sec.id,
+                term=sec.term,
+                status=en.status,
+            ))
+            n_enrollments += 1
+
+    # Commit the archive copies before removing anything from the hot tables.
+    db.session.commit()
+
+    for sec in sections:
+        db.session.delete(sec)   # cascades to meetings and enrollments
+
+    term.archived_at = datetime.utcnow()
+    db.session.commit()
+
+    return len(sections), n_meetings, n_enrollments
+
+
+def close_term(term):
+    """
+    Closes a term: it stops accepting schedule changes and drops out of the
+    default catalog, but its sections stay in the hot tables until archived.
+    """
+    term.is_active = False
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Close terms, or move closed terms into the archive database."
+    )
+    parser.add_argument("terms", nargs="*", help="Term codes to archive, e.g. FALL2025")
+    parser.add_argument(
+        "--all-inactive", action="store_true",
+        help="Archive every inactive term that has not been archived yet.",
+    )
+    parser.add_argument(
+        "--close", action="store_true",
+        help="Only close the given terms (mark them inactive); archive them later.",
+    )
+    args = parser.parse_args()
+
+    if not args.terms and not args.all_inactive:
+        parser.error("give one or more term codes, or --all-inactive")
+    if args.close and args.all_inactive:
+        parser.error("--close takes term codes, not --all-inactive")
+
+    app = create_app()
+    with app.app_context():
+        if args.all_inactive:
+            terms = Term.query.filter(
+                Term.is_active.is_(False),
+                Term.archived_at.is_(None),
+            ).all()
+        else:
+            codes = [c.upper() for c in args.terms]
+            terms = Term.query.filter(Term.code.in_(codes)).all()
+            missing = set(codes) - {t.code for t in terms}
+            if missing:
+                parser.error(f"unknown term(s): {', '.join(sorted(missing))}")
+
+        if args.close:
+            for term in terms:
+                close_term(term)
+                print(f"Closed {term.code}; archive it once the term is over.")
+            return
+
+        for term in terms:
+            if term.is_active:
+                print(f"Skipping {term.code}: term is still active (close it with --close).")
+                continue
+            n_sec, n_meet, n_enr = archive_term(term)
+            print(
+                f"Archived {term.code}: {n_sec} sections, "
+                f"{n_meet} meetings, {n_enr} enrollments."
+            )
+
+        remaining = Enrollment.query.count()
+        print(f"{remaining} enrollments remain in the hot tables.")
+
+
+if __name__ == "__main__":
+    main()
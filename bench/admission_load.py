@@ -0,0 +1,232 @@
+"""
+Local multi-process load test for registration-window admission control.
+
+Starts gunicorn against a throwaway database, then has many client
+processes hammer /api/schedule/add and /api/schedule/remove at once, the way
+students do when a registration window opens. The run is repeated with
+admission control off and on, and throughput, failures and latency are
+printed for both. The defaults queue requests on a single core; scale
+--clients and --workers with the cores available, keeping clients well above
+what --max-concurrent admitted requests can serve.
+
+    python bench/admission_load.py --clients 512 --procs 8 --workers 128 --duration 20
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def seed(db_dir, n_students, n_sections):
+    from werkzeug.security import generate_password_hash
+    from app import create_app
+    from models import db, Student, Course, Term, Section, SectionMeeting
+
+    app = create_app(db_config(db_dir))
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        db.session.add(Term(code="FALL2025", label="Fall 2025", academic_year=2025, is_active=True))
+        course = Course(code="LOAD 100", title="Load Testing", subject="LOAD",
+                        credits=3, instructor="Bench")
+        db.session.add(course)
+
+        for i in range(n_sections):
+            section = Section(crn=50000 + i, term="FALL2025",
+                              section_code=f"{i:03d}", course=course)
+            db.session.add(section)
+            db.session.add(SectionMeeting(day_of_week=1 + i % 5, start_time="09:00",
+                                          end_time="10:15", section=section))
+
+        password_hash = generate_password_hash("x")
+        standings = ["senior", "junior", "sophomore", "freshman"]
+        for i in range(n_students):
+            db.session.add(Student(email=f"load{i}@scholar.edu", name=f"Load {i}",
+                                   password_hash=password_hash, role="student",
+                                   class_standing=standings[i % len(standings)]))
+        db.session.commit()
+        return [s.id for s in Section.query.all()]
+
+
+def db_config(db_dir):
+    return {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_dir}/registration.db",
+        "SQLALCHEMY_BINDS": {
+            "archive": f"sqlite:///{db_dir}/archive.db",
+            "admission": f"sqlite:///{db_dir}/admission.db",
+            "events": f"sqlite:///{db_dir}/events.db",
+        },
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_dir, port, workers, threads, admission):
+    env = dict(os.environ)
+    cfg = db_config(db_dir)
+    env["FLASK_SQLALCHEMY_DATABASE_URI"] = cfg["SQLALCHEMY_DATABASE_URI"]
+    env["FLASK_SQLALCHEMY_BINDS"] = json.dumps(cfg["SQLALCHEMY_BINDS"])
+    env["FLASK_ADMISSION_CONTROL"] = json.dumps(
+        {"default": admission} if admission else {"default": {"enabled": False}}
+    )
+    # Preloaded, so every worker is up before the clients start rather than
+    # still importing the app during the measured run.
+    env["GUNICORN_BIND"] = f"127.0.0.1:{port}"
+    env["GUNICORN_WORKERS"] = str(workers)
+    env["GUNICORN_PRELOAD"] = "1"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+         "--threads", str(threads), "--timeout", "60", "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/hello", timeout=1)
+            return proc
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("gunicorn did not start")
+
+
+def post(url, body, timeout):
+    req = urllib.request.Request(url, data=json.dumps(body).encode(),
+                                 headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, {}
+    except urllib.error.HTTPError as e:
+        try:
+            payload = json.loads(e.read() or b"{}")
+        except ValueError:
+            payload = {}
+        return e.code, payload
+
+
+def client(args):
+    base, email, section_ids, duration, timeout, seed_ = args
+    rng = random.Random(seed_)
+    stats = {"ok": 0, "queued": 0, "failed": 0, "timeouts": 0, "latencies": []}
+    end = time.time() + duration
+    pending = ("add", rng.choice(section_ids))
+
+    while time.time() < end:
+        action, section_id = pending
+        start = time.perf_counter()
+        try:
+            status, payload = post(f"{base}/api/schedule/{action}",
+                                   {"email": email, "section_id": section_id}, timeout)
+        except (socket.timeout, TimeoutError, urllib.error.URLError, OSError):
+            stats["timeouts"] += 1
+            continue
+        elapsed = time.perf_counter() - start
+
+        if status == 429:
+            stats["queued"] += 1
+            retry = payload.get("queue", {}).get("retry_after", 1)
+            time.sleep(min(retry, max(end - time.time(), 0)))
+        elif status < 400 or (action == "remove" and status == 404):
+            stats["ok"] += 1
+            stats["latencies"].append(elapsed)
+            pending = ("remove", section_id) if action == "add" else ("add", rng.choice(section_ids))
+        else:
+            stats["failed"] += 1
+
+    return stats
+
+
+def client_process(jobs):
+    """
+    One load-generating process: runs each job in its own thread, so the
+    clients spend their time blocked on the server rather than on CPU.
+    """
+    results = [None] * len(jobs)
+
+    def run_one(i):
+        results[i] = client(jobs[i])
+
+    threads = [threading.Thread(target=run_one, args=(i,)) for i in range(len(jobs))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def run(label, opts, admission):
+    with tempfile.TemporaryDirectory() as db_dir:
+        section_ids = seed(db_dir, opts.clients, opts.sections)
+        port = free_port()
+        server = start_server(db_dir, port, opts.workers, opts.threads, admission)
+        try:
+            base = f"http://127.0.0.1:{port}"
+            jobs = [
+                (base, f"load{i}@scholar.edu", section_ids, opts.duration, opts.timeout, i)
+                for i in range(opts.clients)
+            ]
+            batches = [jobs[i::opts.procs] for i in range(opts.procs)]
+            with multiprocessing.Pool(opts.procs) as pool:
+                results = [r for batch in pool.map(client_process, batches) for r in batch]
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies = [x for r in results for x in r["latencies"]]
+    ok = sum(r["ok"] for r in results)
+    print(
+        f"{label:<14} {ok / opts.duration:>10.1f} {ok:>8} "
+        f"{sum(r['queued'] for r in results):>8} {sum(r['failed'] for r in results):>7} "
+        f"{sum(r['timeouts'] for r in results):>9} "
+        f"{percentile(latencies, 0.5) * 1000:>8.0f} {percentile(latencies, 0.95) * 1000:>8.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=512)
+    parser.add_argument("--procs", type=int, default=8, help="client processes")
+    parser.add_argument("--workers", type=int, default=128)
+    parser.add_argument("--threads", type=int, default=1, help="threads per gunicorn worker")
+    parser.add_argument("--sections", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--timeout", type=float, default=10, help="client timeout, seconds")
+    parser.add_argument("--max-concurrent", type=int, default=8)
+    parser.add_argument("--policy", type=json.loads, default={},
+                        help='extra admission policy as JSON, e.g. \'{"max_hold": 3}\'')
+    opts = parser.parse_args()
+
+    print(f"{opts.clients} clients in {opts.procs} processes, {opts.workers} gunicorn workers, "
+          f"{opts.duration:.0f}s per run")
+    print(f"{'mode':<14} {'mutations/s':>10} {'ok':>8} {'queued':>8} {'failed':>7} "
+          f"{'timeouts':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    run("no admission", opts, None)
+    run("admission", opts, {"enabled": True, "max_concurrent": opts.max_concurrent, **opts.policy})
+
+
+if __name__ == "__main__":
+    main()
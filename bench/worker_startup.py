@@ -0,0 +1,143 @@
+"""
+Worker startup benchmark.
+
+Measures what each worker process pays before serving: importing app.py,
+running create_app() (schema-version check) and, for comparison, the
+unconditional db.create_all() the factory used to run. Then starts gunicorn
+with and without GUNICORN_PRELOAD and times how long it takes to answer, and
+how fast the first catalog requests are.
+
+    python bench/worker_startup.py --samples 5 --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter per sample so import costs are real.
+PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+flask_app = app.create_app()
+t2 = time.perf_counter()
+factory_statements = len(statements)
+
+from models import db
+with flask_app.app_context():
+    db.create_all(bind_key="__all__")
+t3 = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "create_app_statements": factory_statements,
+    "create_all_ms": (t3 - t2) * 1000,
+    "create_all_statements": len(statements) - factory_statements,
+}))
+"""
+
+
+def env_for(db_dir):
+    env = dict(os.environ)
+    env["FLASK_SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_dir}/registration.db"
+    env["FLASK_SQLALCHEMY_BINDS"] = json.dumps({
+        "archive": f"sqlite:///{db_dir}/archive.db",
+        "admission": f"sqlite:///{db_dir}/admission.db",
+        "events": f"sqlite:///{db_dir}/events.db",
+    })
+    return env
+
+
+def probe_factory(env, samples):
+    results = []
+    for _ in range(samples):
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True)
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {k: statistics.median(r[k] for r in results) for k in results[0]}
+
+
+def get(url, timeout=5):
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        resp.read()
+    return time.perf_counter() - start
+
+
+def probe_gunicorn(env, workers, preload, port):
+    env = dict(env)
+    env["GUNICORN_BIND"] = f"127.0.0.1:{port}"
+    env["GUNICORN_WORKERS"] = str(workers)
+    env["GUNICORN_PRELOAD"] = "1" if preload else ""
+    base = f"http://127.0.0.1:{port}"
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        while True:
+            try:
+                get(f"{base}/api/hello", timeout=1)
+                break
+            except (urllib.error.URLError, OSError):
+                if time.perf_counter() - start > 30:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.02)
+        ready = time.perf_counter() - start
+
+        # Enough requests to reach every worker at least once.
+        first = [get(f"{base}/api/courses") for _ in range(workers * 2)]
+        return ready, statistics.mean(first), max(first)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    opts = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        env = env_for(db_dir)
+        subprocess.run([sys.executable, "seed_data.py"], cwd=ROOT, env=env,
+                       check=True, capture_output=True)
+
+        f = probe_factory(env, opts.samples)
+        print(f"Per-worker startup (median of {opts.samples} fresh interpreters)")
+        print(f"  import app            {f['import_ms']:8.1f} ms")
+        print(f"  create_app()          {f['create_app_ms']:8.1f} ms  "
+              f"{f['create_app_statements']:.0f} SQL statements")
+        print(f"  db.create_all() (old) {f['create_all_ms']:8.1f} ms  "
+              f"{f['create_all_statements']:.0f} SQL statements")
+
+        print(f"\ngunicorn, {opts.workers} workers")
+        print(f"  {'mode':<10} {'ready ms':>9} {'first /api/courses mean ms':>27} {'max ms':>8}")
+        for preload in (False, True):
+            ready, mean, worst = probe_gunicorn(env, opts.workers, preload, opts.port)
+            label = "preload" if preload else "no preload"
+            print(f"  {label:<10} {ready * 1000:>9.0f} {mean * 1000:>27.1f} {worst * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
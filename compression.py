@@ -0,0 +1,293 @@
+import functools
+import gzip
+import importlib.util
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, jsonify, request
+
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain", "text/css"}
+
+# Levels used for per-request compression (cheap) and for payloads that are
+# compressed once and then served many times (expensive but smaller).
+FAST_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+BEST_LEVELS = {"zstd": 19, "br": 11, "gzip": 9}
+
+
+def _compress_gzip(data: bytes, level: int) -> bytes:
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+# The optional codecs are imported on first use, not at worker startup.
+
+def _compress_br(data: bytes, level: int) -> bytes:
+    import brotli
+    return brotli.compress(data, quality=level)
+
+
+def _compress_zstd(data: bytes, level: int) -> bytes:
+    import zstandard
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+@functools.lru_cache(maxsize=None)
+def available_encodings():
+    """
+    Encodings this process can produce, in server preference order.
+    """
+    encodings = []
+    if importlib.util.find_spec("zstandard") is not None:
+        encodings.append("zstd")
+    if importlib.util.find_spec("brotli") is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+ENCODERS = {
+    "zstd": _compress_zstd,
+    "br": _compress_br,
+    "gzip": _compress_gzip,
+}
+
+
+def negotiate_encoding():
+    """
+    Picks the best encoding from the request's Accept-Encoding header,
+    or None when the client should get the identity body.
+    """
+    accept = request.accept_encodings
+    if not accept:
+        return None
+    best = accept.best_match(available_encodings())
+    if not best:
+        return None
+    if accept.quality(best) <= accept.quality("identity") and "identity" in accept:
+        return None
+    return best
+
+
+class CompressionStats:
+    """
+    Per-process counters for response sizes and compression time,
+    keyed by encoding.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.encodings = {}
+        self.catalog_hits = 0
+        self.catalog_misses = 0
+
+    def _bucket(self, encoding):
+        return self.encodings.setdefault(encoding, {
+            "responses": 0,
+            "bytes_out": 0,
+            "compressed_payloads": 0,
+            "bytes_in": 0,
+            "compressed_bytes": 0,
+            "compress_seconds": 0.0,
+        })
+
+    def record_compress(self, encoding, bytes_in, bytes_out, seconds):
+        with self._lock:
+            bucket = self._bucket(encoding)
+            bucket["compressed_payloads"] += 1
+            bucket["bytes_in"] += bytes_in
+            bucket["compressed_bytes"] += bytes_out
+            bucket["compress_seconds"] += seconds
+
+    def record_response(self, encoding, bytes_out):
+        with self._lock:
+            bucket = self._bucket(encoding or "identity")
+            bucket["responses"] += 1
+            bucket["bytes_out"] += bytes_out
+
+    def record_catalog(self, hit):
+        with self._lock:
+            if hit:
+                self.catalog_hits += 1
+            else:
+                self.catalog_misses += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "encodings": {k: dict(v) for k, v in self.encodings.items()},
+                "catalog_cache": {
+                    "hits": self.catalog_hits,
+                    "misses": self.catalog_misses,
+                },
+            }
+
+
+def compress_timed(encoding, data, level, stats):
+    start = time.perf_counter()
+    body = ENCODERS[encoding](data, level)
+    stats.record_compress(encoding, len(data), len(body), time.perf_counter() - start)
+    return body
+
+
+class CachedPayload:
+    """
+    A serialized JSON body plus its pre-compressed variants.
+    """
+
+    def __init__(self, body: bytes, stats: CompressionStats):
+        self.body = body
+        self.created_at = time.monotonic()
+        self.variants = {
+            encoding: compress_timed(encoding, body, BEST_LEVELS[encoding], stats)
+            for encoding in available_encodings()
+        }
+
+    def sizes(self):
+        sizes = {"identity": len(self.body)}
+        sizes.update({k: len(v) for k, v in self.variants.items()})
+        return sizes
+
+
+class PayloadCache:
+    """
+    In-process cache of pre-compressed JSON payloads for hot catalog queries.
+
+    Entries expire after `ttl` seconds so that workers pick up catalog
+    changes made by other processes (e.g. re-running seed_data.py). At most
+    `max_entries` payloads are kept; the least recently used is dropped.
+    """
+
+    def __init__(self, stats: CompressionStats, ttl: float = 300.0, max_entries: int = 64):
+        self.stats = stats
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._building = {}   # key -> lock held while that payload is built
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl and time.monotonic() - entry.created_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body: bytes) -> CachedPayload:
+        entry = CachedPayload(body, self.stats)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_or_build(self, key, build):
+        """
+        Returns (entry, hit). On a miss only one request per key builds and
+        compresses the payload; concurrent requests for the same key wait for
+        it instead of all compressing at the best levels.
+        """
+        entry = self.get(key)
+        if entry is not None:
+            return entry, True
+
+        with self._lock:
+            key_lock = self._building.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self.get(key)
+            hit = entry is not None
+            if not hit:
+                entry = self.put(key, build())
+        with self._lock:
+            if self._building.get(key) is key_lock:
+                del self._building[key]
+        return entry, hit
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "/".join(str(part) for part in key if part): entry.sizes()
+                for key, entry in self._entries.items()
+            }
+
+
+def cached_json_response(key, build):
+    """
+    Serves a JSON payload from the catalog cache, building and pre-compressing
+    it on a miss. `build` returns the JSON-serializable result.
+    """
+    ext = current_app.extensions["compression"]
+    cache = ext["cache"]
+    stats = ext["stats"]
+
+    entry, hit = cache.get_or_build(key, lambda: jsonify(build()).get_data())
+    stats.record_catalog(hit=hit)
+
+    encoding = negotiate_encoding()
+    body = entry.variants.get(encoding) if encoding else None
+
+    response = current_app.response_class(
+        body if body is not None else entry.body,
+        mimetype="application/json",
+    )
+    if body is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def init_compression(app):
+    """
+    Registers negotiated response compression and the catalog payload cache.
+    """
+    app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+    app.config.setdefault("CATALOG_CACHE_TTL", 300)
+    app.config.setdefault("CATALOG_CACHE_MAX_ENTRIES", 64)
+
+    stats = CompressionStats()
+    cache = PayloadCache(
+        stats,
+        ttl=app.config["CATALOG_CACHE_TTL"],
+        max_entries=app.config["CATALOG_CACHE_MAX_ENTRIES"],
+    )
+    app.extensions["compression"] = {"stats": stats, "cache": cache}
+
+    @app.after_request
+    def compress_response(response):
+        if response.direct_passthrough or response.is_streamed:
+            return response
+
+        if "Content-Encoding" in response.headers:
+            # Already encoded (e.g. served from the catalog cache).
+            stats.record_response(response.headers["Content-Encoding"],
+                                  response.content_length or 0)
+            return response
+
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or response.status_code < 200 or response.status_code == 204):
+            return response
+
+        data = response.get_data()
+        response.vary.add("Accept-Encoding")
+        encoding = None
+        if len(data) >= app.config["COMPRESS_MIN_SIZE"]:
+            encoding = negotiate_encoding()
+
+        if encoding:
+            body = compress_timed(encoding, data, FAST_LEVELS[encoding], stats)
+            response.set_data(body)
+            response.headers["Content-Encoding"] = encoding
+
+        stats.record_response(encoding, response.content_length or 0)
+        return response
+
+    return stats, cache
@@ -0,0 +1,285 @@
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import event, text
+
+import analytics
+from models import db, begin_immediate
+
+# Log-side statements (the "events" bind).
+_APPEND = text("""
+    INSERT INTO enrollment_events (kind, student_id, section_id, created_at)
+    VALUES (:kind, :student_id, :section_id, :now)
+""")
+_PENDING = text("""
+    SELECT seq, kind, student_id, section_id FROM enrollment_events
+    WHERE seq > :last_seq ORDER BY seq LIMIT :limit
+""")
+_PENDING_FOR_STUDENT = text("""
+    SELECT seq, kind, section_id FROM enrollment_events
+    WHERE student_id = :student_id AND seq > :last_seq ORDER BY seq
+""")
+_HEAD = text("SELECT COALESCE(MAX(seq), 0) FROM enrollment_events")
+
+# Registration-database statements.
+_INIT_STATE = text("INSERT OR IGNORE INTO event_log_state (id, last_seq) VALUES (1, 0)")
+_LAST_SEQ = text("SELECT last_seq FROM event_log_state WHERE id = 1")
+_ADVANCE = text("UPDATE event_log_state SET last_seq = :new_seq WHERE id = 1")
+# One statement, so the enrollments and the applied seq come from the same
+# snapshot even while the applier is committing.
+_APPLIED_SCHEDULE = text("""
+    SELECT s.last_seq, e.section_id, e.status
+    FROM event_log_state s
+    LEFT JOIN enrollments e ON e.student_id = :student_id
+    WHERE s.id = 1
+    ORDER BY e.id
+""")
+_APPLY = {
+    "ADD": text("""
+        INSERT INTO enrollments (student_id, section_id, status)
+        SELECT :student_id, :section_id, 'PENDING'
+        WHERE EXISTS (SELECT 1 FROM sections WHERE id = :section_id)
+          AND NOT EXISTS (SELECT 1 FROM enrollments
+                          WHERE student_id = :student_id AND section_id = :section_id)
+    """),
+    "REMOVE": text("""
+        DELETE FROM enrollments
+        WHERE student_id = :student_id AND section_id = :section_id
+        RETURNING section_id, status
+    """),
+    "CONFIRM": text("""
+        UPDATE enrollments SET status = 'CONFIRMED'
+        WHERE student_id = :student_id AND status != 'CONFIRMED'
+        RETURNING section_id
+    """),
+}
+
+
+def _durable_log_db(dbapi_conn, _record):
+    # The log is the only copy of a mutation until it is applied, so every
+    # append is fsynced. WAL keeps appends sequential and lets readers run
+    # alongside the writer.
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=FULL")
+    cur.close()
+
+
+def _log_engine():
+    return db.engines["events"]
+
+
+def _last_applied_seq():
+    last_seq = db.session.execute(_LAST_SEQ).scalar()
+    if last_seq is None:
+        db.session.execute(_INIT_STATE)
+        db.session.commit()
+        last_seq = 0
+    return last_seq
+
+
+def append(kind, student_id, section_id=None):
+    """
+    Durably appends one validated mutation and returns its seq.
+    """
+    with _log_engine().begin() as conn:
+        result = conn.execute(_APPEND, {
+            "kind": kind,
+            "student_id": student_id,
+            "section_id": section_id,
+            "now": time.time(),
+        })
+        return result.lastrowid
+
+
+def student_schedule(student_id):
+    """
+    The student's schedule as {section_id: status}: applied enrollments
+    with their not-yet-applied events replayed on top, so students always
+    read their own writes.
+    """
+    rows = db.session.execute(_APPLIED_SCHEDULE, {"student_id": student_id}).all()
+    if not rows:
+        _last_applied_seq()
+        rows = db.session.execute(_APPLIED_SCHEDULE, {"student_id": student_id}).all()
+    last_seq = rows[0].last_seq
+    schedule = {r.section_id: r.status for r in rows if r.section_id is not None}
+
+    with _log_engine().connect() as conn:
+        pending = conn.execute(_PENDING_FOR_STUDENT, {
+            "student_id": student_id,
+            "last_seq": last_seq,
+        }).all()
+
+    for ev in pending:
+        if ev.kind == "ADD":
+            schedule.setdefault(ev.section_id, "PENDING")
+        elif ev.kind == "REMOVE":
+            schedule.pop(ev.section_id, None)
+        elif ev.kind == "CONFIRM":
+            schedule = {sid: "CONFIRMED" for sid in schedule}
+    return schedule
+
+
+def apply_pending(batch_size=500):
+    """
+    Applies up to `batch_size` events to the enrollment tables in one
+    transaction. Returns the number applied; 0 if there was nothing to do.
+
+    Every worker process runs an applier. The batch is read and applied
+    under the registration database's write lock, so an applier that loses
+    the race waits for the winner's commit and then finds nothing left,
+    instead of applying the same events and rolling them back.
+    """
+    # Most polls find nothing to do; check without taking the lock.
+    last_seq = _last_applied_seq()
+    with _log_engine().connect() as conn:
+        head = conn.execute(_HEAD).scalar()
+    if head <= last_seq:
+        return 0
+
+    try:
+        begin_immediate()
+        last_seq = db.session.execute(_LAST_SEQ).scalar()
+        with _log_engine().connect() as conn:
+            events = conn.execute(_PENDING, {"last_seq": last_seq, "limit": batch_size}).all()
+        if not events:
+            db.session.rollback()
+            return 0
+
+        for ev in events:
+            result = db.session.execute(_APPLY[ev.kind], {
+                "student_id": ev.student_id,
+                "section_id": ev.section_id,
+            })
+            # Keep the analytics counters in step, in the same transaction.
+            if ev.kind == "ADD":
+                if result.rowcount:
+                    analytics.bump(ev.section_id, pending=1)
+            elif ev.kind == "REMOVE":
+                for section_id, status in result.all():
+                    analytics.bump_status(section_id, status, -1)
+            elif ev.kind == "CONFIRM":
+                for (section_id,) in result.all():
+                    analytics.bump(section_id, pending=-1, confirmed=1)
+        db.session.execute(_ADVANCE, {"new_seq": events[-1].seq})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return len(events)
+
+
+def skip_to_head():
+    """
+    Marks every logged event as applied without applying it, for a freshly
+    seeded registration database that the log's history does not describe.
+    """
+    with _log_engine().connect() as conn:
+        head = conn.execute(_HEAD).scalar()
+    _last_applied_seq()
+    db.session.execute(_ADVANCE, {"new_seq": head})
+    db.session.commit()
+
+
+def apply_all(batch_size=500):
+    """
+    Applies every pending event, batch by batch. Returns the number applied.
+    """
+    total = 0
+    while True:
+        applied = apply_pending(batch_size)
+        if not applied:
+            return total
+        total += applied
+
+
+def _applier_loop(app):
+    interval = app.config["EVENT_LOG_APPLY_INTERVAL"]
+    batch_size = app.config["EVENT_LOG_BATCH_SIZE"]
+    while True:
+        applied = 0
+        try:
+            with app.app_context():
+                applied = apply_pending(batch_size)
+        except Exception:
+            app.logger.exception("Applying enrollment events failed; will retry.")
+        if applied < batch_size:
+            time.sleep(interval)
+
+
+def init_event_log(app):
+    """
+    Sets up write-behind enrollment mode (ENROLLMENT_WRITE_BEHIND): tunes the
+    log database and starts one applier thread per worker process on its
+    first request.
+    """
+    app.config.setdefault("EVENT_LOG_BATCH_SIZE", 500)
+    app.config.setdefault("EVENT_LOG_APPLY_INTERVAL", 0.2)
+
+    with app.app_context():
+        event.listen(_log_engine(), "connect", _durable_log_db)
+        _log_engine().dispose()
+
+    started = {"pid": None}
+    lock = threading.Lock()
+
+    # Started lazily, per process: threads do not survive a pre-fork.
+    @app.before_request
+    def start_applier():
+        if started["pid"] == os.getpid():
+            return
+        with lock:
+            if started["pid"] != os.getpid():
+                threading.Thread(
+                    target=_applier_loop, args=(app,),
+                    name="enrollment-event-applier", daemon=True,
+                ).start()
+                started["pid"] = os.getpid()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enrollment event log tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Show log head and last applied seq.")
+    sub.add_parser("apply", help="Apply every pending event (crash recovery).")
+    audit = sub.add_parser("audit", help="Print logged events.")
+    audit.add_argument("--email", help="Only events for this student.")
+    audit.add_argument("--since", type=int, default=0, help="Only events after this seq.")
+    args = parser.parse_args()
+
+    from app import create_app
+    from models import Student, EnrollmentEvent
+
+    app = create_app()
+    with app.app_context():
+        if args.command == "status":
+            last_seq = _last_applied_seq()
+            with _log_engine().connect() as conn:
+                head = conn.execute(_HEAD).scalar()
+            print(f"log head: {head}, applied: {last_seq}, pending: {head - last_seq}")
+
+        elif args.command == "apply":
+            total = apply_all(current_app.config.get("EVENT_LOG_BATCH_SIZE", 500))
+            print(f"Applied {total} events.")
+
+        elif args.command == "audit":
+            query = EnrollmentEvent.query.filter(EnrollmentEvent.seq > args.since)
+            if args.email:
+                student = Student.query.filter_by(email=args.email).first()
+                if not student:
+                    parser.error(f"unknown student: {args.email}")
+                query = query.filter(EnrollmentEvent.student_id == student.id)
+            for ev in query.order_by(EnrollmentEvent.seq):
+                when = datetime.fromtimestamp(ev.created_at).isoformat(timespec="seconds")
+                section = ev.section_id if ev.section_id is not None else "-"
+                print(f"{ev.seq:>8} {when} {ev.kind:<8} student={ev.student_id} section={section}")
+
+
+if __name__ == "__main__":
+    main()
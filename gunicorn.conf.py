@@ -0,0 +1,23 @@
+# gunicorn -c gunicorn.conf.py
+#
+# The app is built by the factory only; importing app.py has no side effects.
+# With GUNICORN_PRELOAD=1 the master builds the app once, warms the catalog
+# cache, and forks workers that inherit both instead of each paying for it.
+import os
+
+wsgi_app = "app:create_app()"
+bind = os.environ.get("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "") in ("1", "true")
+
+
+def when_ready(server):
+    if preload_app:
+        from app import warm_up
+        warm_up(server.app.wsgi())
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app import after_fork
+        after_fork(server.app.wsgi())
@@ -0,0 +1,105 @@
+import argparse
+import re
+
+from sqlalchemy import text
+
+from app import create_app
+from models import db, Term, SCHEMA_VERSIONS, stamp_schema_version
+import analytics
+
+SEASONS = {"FALL": "Fall", "WINTER": "Winter", "SPRING": "Spring", "SUMMER": "Summer"}
+
+# Columns added to existing tables since the original schema. New tables
+# (terms, section_enrollment_counts, event_log_state) come from create_all.
+NEW_COLUMNS = [
+    ("students", "class_standing", "VARCHAR(20)"),
+    ("sections", "capacity", "INTEGER NOT NULL DEFAULT 30"),
+]
+NEW_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_sections_term ON sections (term)",
+    "CREATE INDEX IF NOT EXISTS ix_enrollments_student_id ON enrollments (student_id)",
+    "CREATE INDEX IF NOT EXISTS ix_enrollments_section_id ON enrollments (section_id)",
+]
+
+
+def qualify(code, year):
+    """
+    Year-qualified term code and (label, academic year) for a section's term.
+    Fall belongs to `year`; the other seasons to the calendar year after it.
+    Codes that already end in a year are kept.
+    """
+    code = code.strip().upper()
+    match = re.fullmatch(r"([A-Z]+)(\d{4})", code)
+    if match:
+        season, calendar_year = match.group(1), int(match.group(2))
+        academic_year = calendar_year if season == "FALL" else calendar_year - 1
+        return code, SEASONS.get(season, season.title()), calendar_year, academic_year
+
+    calendar_year = year if code == "FALL" else year + 1
+    return (f"{code}{calendar_year}", SEASONS.get(code, code.title()),
+            calendar_year, year)
+
+
+def migrate(year):
+    """
+    Upgrades a registration database created before terms and schema
+    versions existed, keeping every student, section and enrollment.
+    Safe to re-run.
+    """
+    conn = db.session.connection()
+
+    for table, column, ddl in NEW_COLUMNS:
+        existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+            print(f"Added {table}.{column}")
+    for ddl in NEW_INDEXES:
+        conn.exec_driver_sql(ddl)
+    db.session.commit()
+
+    db.create_all(bind_key=None)
+
+    codes = [row[0] for row in db.session.execute(text("SELECT DISTINCT term FROM sections"))]
+    for old in codes:
+        new, season, calendar_year, academic_year = qualify(old, year)
+        if new != old:
+            db.session.execute(
+                text("UPDATE sections SET term = :new WHERE term = :old"),
+                {"new": new, "old": old},
+            )
+            print(f"Renamed term {old} -> {new}")
+        if not db.session.get(Term, new):
+            db.session.add(Term(
+                code=new,
+                label=f"{season} {calendar_year}",
+                academic_year=academic_year,
+                is_active=True,
+            ))
+            print(f"Created term {new}")
+    db.session.commit()
+
+    # Backfill the analytics counters from the existing enrollments.
+    analytics.recompute(write=True)
+
+    stamp_schema_version([None])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Upgrade a registration database from before terms were tracked."
+    )
+    parser.add_argument(
+        "--year", type=int, required=True,
+        help="Academic year of bare term codes, e.g. 2025 turns FALL into FALL2025 "
+             "and SPRING into SPRING2026.",
+    )
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        migrate(args.year)
+        print(f"Registration database is at schema version {SCHEMA_VERSIONS[None]}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,105 @@
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
 
 db = SQLAlchemy()
 
+# Schema version of each database, by bind key. Bump a bind's entry whenever
+# one of its models changes. Each database file records the version it was
+# created at in PRAGMA user_version, so startup can skip create_all (and its
+# per-table inspection queries) when nothing changed.
+SCHEMA_VERSIONS = {
+    None: 1,            # registration.db
+    "archive": 1,
+    "admission": 2,
+    "events": 1,
+}
+
+# Databases holding only transient state (admission tickets). On a version
+# mismatch they are dropped and recreated instead of needing an upgrade.
+DISPOSABLE_BINDS = {"admission"}
+
+# What an operator should do with a database at the wrong version. The
+# archive and the event log hold data that exists nowhere else, so they are
+# never rebuilt automatically.
+UPGRADE_HINTS = {
+    None: "upgrade it with migrate_schema.py.",
+}
+DEFAULT_UPGRADE_HINT = "it holds data that cannot be rebuilt; upgrade it by hand."
+
+
+def _stamp(engine, version):
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def stamp_schema_version(bind_keys=None):
+    """
+    Records the current schema version in the given databases (default: all
+    of them). Call after rebuilding a database's tables, as seed_data.py does.
+    """
+    for bind_key, engine in db.engines.items():
+        if bind_keys is None or bind_key in bind_keys:
+            _stamp(engine, SCHEMA_VERSIONS[bind_key])
+
+
+def begin_immediate():
+    """
+    Starts the session's transaction with BEGIN IMMEDIATE, taking the
+    database's write lock up front so that nothing another process commits
+    can land between this transaction's reads and its writes. Call it
+    before the transaction has written anything.
+    """
+    db.session.execute(text("BEGIN IMMEDIATE"))
+
+def ensure_schema(app):
+    """
+    Creates the tables of any database that is not at its SCHEMA_VERSIONS
+    entry.
+
+    An empty database is created and stamped. A disposable one (see
+    DISPOSABLE_BINDS) with tables from another version is dropped and
+    recreated. Any other database with tables from another version, or from
+    before versions were recorded (user_version 0), just gets its missing
+    tables and a warning on every start: create_all cannot change existing
+    columns, so it needs an upgrade (see UPGRADE_HINTS).
+    """
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            expected = SCHEMA_VERSIONS[bind_key]
+            for attempt in range(3):
+                with engine.connect() as conn:
+                    version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+                    n_tables = conn.exec_driver_sql(
+                        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'"
+                    ).scalar()
+                if version == expected:
+                    break
+                try:
+                    if n_tables and bind_key in DISPOSABLE_BINDS:
+                        app.logger.info(
+                            "Rebuilding %s for schema version %s (was %s).",
+                            engine.url, expected, version,
+                        )
+                        db.drop_all(bind_key=bind_key)
+                        n_tables = 0
+                    elif n_tables:
+                        app.logger.warning(
+                            "Database %s is at schema version %s, expected %s; %s",
+                            engine.url, version or "0 (unversioned)", expected,
+                            UPGRADE_HINTS.get(bind_key, DEFAULT_UPGRADE_HINT),
+                        )
+                    db.create_all(bind_key=bind_key)
+                except OperationalError:
+                    # Another worker is creating the same tables; re-check.
+                    if attempt == 2:
+                        raise
+                    continue
+                if not n_tables:
+                    _stamp(engine, expected)
+                break
+
 
 class Student(db.Model):
     __tablename__ = "students"
@@ -12,6 +109,7 @@ class Student(db.Model):
     name = db.Column(db.String(255), nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(50), nullable=False, default="student")  
+    class_standing = db.Column(db.String(20), nullable=True)   # "senior", "junior", ...
 
     enrollments = db.relationship(
         "Enrollment",
@@ -49,16 +147,33 @@ class Course(db.Model):
         return f"<Course {self.code}>"
 
 
+class Term(db.Model):
+    __tablename__ = "terms"
+
+    code = db.Column(db.String(20), primary_key=True)   # year-qualified, e.g. "FALL2025"
+    label = db.Column(db.String(50), nullable=False)    # e.g. "Fall 2025"
+    academic_year = db.Column(db.Integer, nullable=False)  # starting year, e.g. 2025
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    archived_at = db.Column(db.DateTime, nullable=True)
+
+    sections = db.relationship("Section", back_populates="term_info")
+
+    def __repr__(self):
+        return f"<Term {self.code} {self.academic_year} active={self.is_active}>"
+
+
 class Section(db.Model):
     __tablename__ = "sections"
 
     id = db.Column(db.Integer, primary_key=True)
     crn = db.Column(db.Integer, unique=True, nullable=False)
-    term = db.Column(db.String(20), nullable=False)   
+    term = db.Column(db.String(20), db.ForeignKey("terms.code"), nullable=False, index=True)
     section_code = db.Column(db.String(20), nullable=False)
+    capacity = db.Column(db.Integer, nullable=False, default=30)
 
     course_id = db.Column(db.Integer, db.ForeignKey("courses.id"), nullable=False)
     course = db.relationship("Course", back_populates="sections")
+    term_info = db.relationship("Term", back_populates="sections")
 
     meetings = db.relationship(
         "SectionMeeting",
@@ -70,6 +185,11 @@ class Section(db.Model):
         back_populates="section",
         cascade="all, delete-orphan"
     )
+    enrollment_count = db.relationship(
+        "SectionEnrollmentCount",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
 
     def __repr__(self):
         return f"<Section CRN={self.crn} term={self.term}>"
@@ -90,6 +210,20 @@ class SectionMeeting(db.Model):
         return f"<Meeting day={self.day_of_week} {self.start_time}-{self.end_time}>"
 
 
+# Per-section enrollment counters, kept up to date by every schedule
+# mutation (see analytics.py) so admin reports never scan enrollments.
+
+class SectionEnrollmentCount(db.Model):
+    __tablename__ = "section_enrollment_counts"
+
+    section_id = db.Column(db.Integer, db.ForeignKey("sections.id"), primary_key=True)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    confirmed = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SectionEnrollmentCount section={self.section_id} pending={self.pending} confirmed={self.confirmed}>"
+
+
 class Prerequisite(db.Model):
     __tablename__ = "prerequisites"
 
@@ -114,8 +248,8 @@ class Enrollment(db.Model):
     __tablename__ = "enrollments"
 
     id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
-    section_id = db.Column(db.Integer, db.ForeignKey("sections.id"), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False, index=True)
+    section_id = db.Column(db.Integer, db.ForeignKey("sections.id"), nullable=False, index=True)
     status = db.Column(db.String(20), nullable=False, default="PENDING")  
 
     student = db.relationship("Student", back_populates="enrollments")
@@ -123,3 +257,112 @@ class Enrollment(db.Model):
 
     def __repr__(self):
         return f"<Enrollment student={self.student_id} section={self.section_id} status={self.status}>"
+
+
+# Archived terms live in a separate SQLite file (the "archive" bind) so the
+# hot tables above only hold terms that are still in use. Rows keep their
+# original ids and carry denormalized course/student fields because foreign
+# keys cannot reach across database files.
+
+class ArchivedSection(db.Model):
+    __bind_key__ = "archive"
+    __tablename__ = "archived_sections"
+
+    id = db.Column(db.Integer, primary_key=True)
+    crn = db.Column(db.Integer, nullable=False)
+    term = db.Column(db.String(20), nullable=False, index=True)
+    section_code = db.Column(db.String(20), nullable=False)
+    course_id = db.Column(db.Integer, nullable=False)
+    course_code = db.Column(db.String(50), nullable=False)
+    course_title = db.Column(db.String(255), nullable=False)
+
+    def __repr__(self):
+        return f"<ArchivedSection CRN={self.crn} term={self.term}>"
+
+
+class ArchivedSectionMeeting(db.Model):
+    __bind_key__ = "archive"
+    __tablename__ = "archived_section_meetings"
+
+    id = db.Column(db.Integer, primary_key=True)
+    section_id = db.Column(db.Integer, nullable=False, index=True)
+    day_of_week = db.Column(db.Integer, nullable=False)
+    start_time = db.Column(db.String(5), nullable=False)
+    end_time = db.Column(db.String(5), nullable=False)
+
+    def __repr__(self):
+        return f"<ArchivedMeeting day={self.day_of_week} {self.start_time}-{self.end_time}>"
+
+
+class ArchivedEnrollment(db.Model):
+    __bind_key__ = "archive"
+    __tablename__ = "archived_enrollments"
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, nullable=False, index=True)
+    student_email = db.Column(db.String(255), nullable=False)
+    student_name = db.Column(db.String(255), nullable=False)
+    section_id = db.Column(db.Integer, nullable=False, index=True)
+    term = db.Column(db.String(20), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False)
+
+    def __repr__(self):
+        return f"<ArchivedEnrollment student={self.student_id} section={self.section_id} status={self.status}>"
+
+
+# Registration-window admission tickets live in their own SQLite file (the
+# "admission" bind) so queueing never contends for the registration
+# database's write lock. Times are epoch seconds.
+
+class AdmissionTicket(db.Model):
+    __bind_key__ = "admission"
+    __tablename__ = "admission_tickets"
+    __table_args__ = (
+        db.UniqueConstraint("queue", "student_id"),
+        db.Index("ix_admission_tickets_order", "queue", "state", "tier", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    queue = db.Column(db.String(20), nullable=False)   # term code, or "*"
+    student_id = db.Column(db.Integer, nullable=False)
+    tier = db.Column(db.Integer, nullable=False, default=0)   # lower goes first
+    state = db.Column(db.String(10), nullable=False, default="WAITING")   # WAITING / ACTIVE
+    created_at = db.Column(db.Float, nullable=False)
+    last_seen = db.Column(db.Float, nullable=False)
+    expires_at = db.Column(db.Float, nullable=False)   # stops counting as ahead after this
+
+    def __repr__(self):
+        return f"<AdmissionTicket queue={self.queue} student={self.student_id} {self.state}>"
+
+
+# Write-behind enrollment mode (ENROLLMENT_WRITE_BEHIND): validated schedule
+# mutations are appended to this log, in its own SQLite file (the "events"
+# bind), and a background applier folds them into `enrollments`.
+
+class EnrollmentEvent(db.Model):
+    __bind_key__ = "events"
+    __tablename__ = "enrollment_events"
+    __table_args__ = (db.Index("ix_enrollment_events_student_seq", "student_id", "seq"),)
+
+    seq = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False)   # ADD / REMOVE / CONFIRM
+    student_id = db.Column(db.Integer, nullable=False)
+    section_id = db.Column(db.Integer, nullable=True)   # None for CONFIRM
+    created_at = db.Column(db.Float, nullable=False)   # epoch seconds
+
+    def __repr__(self):
+        return f"<EnrollmentEvent #{self.seq} {self.kind} student={self.student_id} section={self.section_id}>"
+
+
+# Single row (id=1) in the registration database holding the last applied
+# event seq. It is updated in the same transaction as the enrollments, so
+# every event is applied exactly once.
+
+class EventLogState(db.Model):
+    __tablename__ = "event_log_state"
+
+    id = db.Column(db.Integer, primary_key=True)
+    last_seq = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<EventLogState last_seq={self.last_seq}>"
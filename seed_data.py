@@ -1,7 +1,10 @@
 
 from werkzeug.security import generate_password_hash
 from app import create_app
-from models import db, Student, Course, Section, SectionMeeting, Prerequisite
+import event_log
+from models import (
+    db, stamp_schema_version, Student, Course, Term, Section, SectionMeeting, Prerequisite,
+)
 
 
 def add_course(code, title, subject, credits, instructor,
@@ -46,8 +49,15 @@ def add_course(code, title, subject, credits, instructor,
 def seed():
     app = create_app()
     with app.app_context():
-        db.drop_all()
-        db.create_all()
+        # Only the registration data and the disposable admission queue are
+        # rebuilt; the archive of closed terms and the enrollment event log
+        # are left alone.
+        rebuilt = [None, "admission"]
+        db.drop_all(bind_key=rebuilt)
+        db.create_all(bind_key=rebuilt)
+        stamp_schema_version(rebuilt)
+        # The kept log describes the data just dropped; don't replay it.
+        event_log.skip_to_head()
 
         
 
@@ -56,18 +66,21 @@ def seed():
             name="Alice Student",
             password_hash=generate_password_hash("Student123!"),
             role="student",
+            class_standing="senior",
         )
         s2 = Student(
             email="student2@scholar.edu",
             name="Bob Student",
             password_hash=generate_password_hash("Student234!"),
             role="student",
+            class_standing="junior",
         )
         s3 = Student(
             email="student3@scholar.edu",
             name="Charlie Student",
             password_hash=generate_password_hash("Student345!"),
             role="student",
+            class_standing="freshman",
         )
         admin = Student(
             email="admin@scholar.edu",
@@ -79,6 +92,13 @@ def seed():
         db.session.add_all([s1, s2, s3, admin])
         db.session.flush()
 
+        db.session.add_all([
+            Term(code="FALL2025", label="Fall 2025", academic_year=2025, is_active=True),
+            Term(code="SPRING2026", label="Spring 2026", academic_year=2025, is_active=True),
+            Term(code="SUMMER2026", label="Summer 2026", academic_year=2025, is_active=True),
+        ])
+        db.session.flush()
+
         
         def MW(s, e):
             return [
@@ -102,70 +122,70 @@ def seed():
         add_course(
             code="CS 101", title="Intro to CS", subject="CS", credits=3,
             instructor="John Lee",
-            term="FALL", section_code="001", crn=10001,
+            term="FALL2025", section_code="001", crn=10001,
             meetings=MW("09:00", "10:15"),
         )
 
         add_course(
             code="CS 220", title="Data Structures", subject="CS", credits=4,
             instructor="Christopher Hernandez",
-            term="FALL", section_code="002", crn=10002,
+            term="FALL2025", section_code="002", crn=10002,
             meetings=TTh("10:30", "11:45"),
         )
 
         add_course(
             code="MATH 201", title="Calculus II", subject="MATH", credits=4,
             instructor="Sandra Rivera",
-            term="FALL", section_code="001", crn=10003,
+            term="FALL2025", section_code="001", crn=10003,
             meetings=MW("12:00", "13:15"),
         )
 
         add_course(
             code="MATH 140", title="Discrete Math", subject="MATH", credits=3,
             instructor="Johnny Perez",
-            term="FALL", section_code="003", crn=10004,
+            term="FALL2025", section_code="003", crn=10004,
             meetings=TTh("09:00", "10:15"),
         )
 
         add_course(
             code="ENG 110", title="English Writing", subject="ENG", credits=3,
             instructor="Chris Baker",
-            term="FALL", section_code="001", crn=10005,
+            term="FALL2025", section_code="001", crn=10005,
             meetings=F("11:00", "12:40"),
         )
 
         add_course(
             code="PHY 150", title="Physics I", subject="PHY", credits=4,
             instructor="Isabella Monje",
-            term="FALL", section_code="002", crn=10006,
+            term="FALL2025", section_code="002", crn=10006,
             meetings=MW("10:30", "11:45"),
         )
 
         add_course(
             code="HIST 210", title="Modern History", subject="HIST", credits=3,
             instructor="Max Ramirez",
-            term="FALL", section_code="001", crn=10007,
+            term="FALL2025", section_code="001", crn=10007,
             meetings=MW("09:30", "10:45"),
         )
 
         add_course(
             code="BIO 130", title="General Biology", subject="BIO", credits=4,
             instructor="Chloe Cena",
-            term="FALL", section_code="001", crn=10008,
+            term="FALL2025", section_code="001", crn=10008,
             meetings=TTh("10:30", "11:45"),
         )
 
         add_course(
             code="ART 105", title="Intro to Drawing", subject="ART", credits=2,
             instructor="Loida Sanchez",
-            term="FALL", section_code="001", crn=10009,
+            term="FALL2025", section_code="001", crn=10009,
             meetings=F("14:00", "15:15"),
         )
 
         add_course(
             code="STAT 250", title="Statistics I", subject="STAT", credits=3,
             instructor="Mark Cuban",
-            term="FALL", section_code="001", crn=10010,
+            term="FALL2025", section_code="001", crn=10010,
             meetings=TTh("13:30", "14:45"),
         )
 
@@ -174,70 +194,70 @@ def seed():
         add_course(
             code="CS 102", title="Programming Fundamentals", subject="CS", credits=3,
             instructor="Grace Monroe",
-            term="SPRING", section_code="001", crn=11001,
+            term="SPRING2026", section_code="001", crn=11001,
             meetings=MW("09:00", "10:15"),
         )
 
         add_course(
             code="CS 221", title="Algorithms", subject="CS", credits=4,
             instructor="Emma Harper",
-            term="SPRING", section_code="001", crn=11002,
+            term="SPRING2026", section_code="001", crn=11002,
             meetings=TTh("10:30", "11:45"),
         )
 
         add_course(
             code="MATH 202", title="Calculus III", subject="MATH", credits=4,
             instructor="Olivia Addison",
-            term="SPRING", section_code="001", crn=11003,
+            term="SPRING2026", section_code="001", crn=11003,
             meetings=MW("12:00", "13:15"),
         )
 
         add_course(
             code="MATH 240", title="Linear Algebra", subject="MATH", credits=3,
             instructor="Charlotte Garcia",
-            term="SPRING", section_code="001", crn=11004,
+            term="SPRING2026", section_code="001", crn=11004,
             meetings=TTh("09:00", "10:15"),
         )
 
         add_course(
             code="ENG 210", title="Literary Analysis", subject="ENG", credits=3,
             instructor="Noah Smith",
-            term="SPRING", section_code="001", crn=11005,
+            term="SPRING2026", section_code="001", crn=11005,
             meetings=F("11:00", "12:40"),
         )
 
         add_course(
             code="PHY 250", title="Physics II", subject="PHY", credits=4,
             instructor="John Williams",
-            term="SPRING", section_code="001", crn=11006,
+            term="SPRING2026", section_code="001", crn=11006,
             meetings=MW("10:30", "11:45"),
         )
 
         add_course(
             code="HIST 220", title="World History", subject="HIST", credits=3,
             instructor="James Ramirez",
-            term="SPRING", section_code="001", crn=11007,
+            term="SPRING2026", section_code="001", crn=11007,
             meetings=MW("09:30", "10:45"),
         )
 
         add_course(
             code="BIO 230", title="Cell Biology", subject="BIO", credits=4,
             instructor="Lucas Miller",
-            term="SPRING", section_code="001", crn=11008,
+            term="SPRING2026", section_code="001", crn=11008,
             meetings=TTh("10:30", "11:45"),
         )
 
         add_course(
             code="ART 205", title="Painting I", subject="ART", credits=2,
             instructor="Ezra Martin",
-            term="SPRING", section_code="001", crn=11009,
+            term="SPRING2026", section_code="001", crn=11009,
             meetings=F("14:00", "15:15"),
         )
 
         add_course(
             code="PSY 101", title="Intro to Psychology", subject="PSY", credits=3,
             instructor="Sebastian Garcia",
-            term="SPRING", section_code="001", crn=11010,
+            term="SPRING2026", section_code="001", crn=11010,
             meetings=TTh("14:00", "15:15"),
         )
 
@@ -246,70 +266,70 @@ def seed():
         add_course(
             code="CS 210", title="Web Development", subject="CS", credits=3,
             instructor="Morgan",
-            term="SUMMER", section_code="001", crn=12001,
+            term="SUMMER2026", section_code="001", crn=12001,
             meetings=TTh("09:00", "10:15"),
         )
 
         add_course(
             code="CS 330", title="Databases", subject="CS", credits=3,
             instructor="Hernandez",
-            term="SUMMER", section_code="001", crn=12002,
+            term="SUMMER2026", section_code="001", crn=12002,
             meetings=MW("10:30", "11:45"),
         )
 
         add_course(
             code="MATH 210", title="Probability", subject="MATH", credits=3,
             instructor="Chen",
-            term="SUMMER", section_code="001", crn=12003,
+            term="SUMMER2026", section_code="001", crn=12003,
             meetings=TTh("12:00", "13:15"),
         )
 
         add_course(
             code="STAT 320", title="Applied Statistics", subject="STAT", credits=3,
             instructor="Kim",
-            term="SUMMER", section_code="001", crn=12004,
+            term="SUMMER2026", section_code="001", crn=12004,
             meetings=MW("13:30", "14:45"),
         )
 
         add_course(
             code="ENG 230", title="Technical Writing", subject="ENG", credits=3,
             instructor="Jake",
-            term="SUMMER", section_code="001", crn=12005,
+            term="SUMMER2026", section_code="001", crn=12005,
             meetings=F("11:00", "12:40"),
         )
 
         add_course(
             code="PHY 210", title="Engineering Physics II", subject="PHY", credits=4,
             instructor="Ariana",
-            term="SUMMER", section_code="001", crn=12006,
+            term="SUMMER2026", section_code="001", crn=12006,
             meetings=MW("09:00", "10:15"),
         )
 
         add_course(
             code="HIST 230", title="US History", subject="HIST", credits=3,
             instructor="Valdez",
-            term="SUMMER", section_code="001", crn=12007,
+            term="SUMMER2026", section_code="001", crn=12007,
             meetings=MW("09:30", "10:45"),
         )
 
         add_course(
             code="BIO 240", title="Genetics", subject="BIO", credits=4,
             instructor="Peter",
-            term="SUMMER", section_code="001", crn=12008,
+            term="SUMMER2026", section_code="001", crn=12008,
             meetings=TTh("12:00", "13:15"),
         )
 
         add_course(
             code="ART 215", title="Digital Photography", subject="ART", credits=2,
             instructor="Bill",
-            term="SUMMER", section_code="001", crn=12009,
+            term="SUMMER2026", section_code="001", crn=12009,
             meetings=F("14:00", "15:15"),
         )
 
         add_course(
             code="PSY 220", title="Developmental Psychology", subject="PSY", credits=3,
             instructor="Jill",
-            term="SUMMER", section_code="001", crn=12010,
+            term="SUMMER2026", section_code="001", crn=12010,
             meetings=TTh("14:00", "15:15"),
         )
 